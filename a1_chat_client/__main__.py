@@ -1,7 +1,8 @@
 from argparse import Namespace, ArgumentParser
+import asyncio
+import os
 import socket
-import threading
-import select
+import sys
 
 
 def parse_arguments() -> Namespace:
@@ -25,145 +26,154 @@ def parse_arguments() -> Namespace:
     return parser.parse_args()
 
 
-def send(string_bytes, sock, isMain=False):
-    # Send the data
-    bytes_len = len(string_bytes)
-    num_bytes_to_send = bytes_len
-    while num_bytes_to_send > 0:
-        num_bytes_to_send -= sock.send(string_bytes[bytes_len - num_bytes_to_send:])
+async def open_stdin():
+    # Wrap stdin in a StreamReader so user input is read on the event loop
+    loop = asyncio.get_running_loop()
+    stdin = asyncio.StreamReader()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stdin), sys.stdin)
+    except ValueError:
+        # Regular files cannot be polled, but reading them never blocks
+        stdin.feed_data(sys.stdin.buffer.read())
+        stdin.feed_eof()
+    return stdin
 
-    if isMain:
-        total_data = b''
-        while True:
-            data = sock.recv(1)
-            if not data:
-                return False
 
-            total_data += data
+async def read_input(stdin):
+    line = await stdin.readline()
+    if not line:
+        return None
+    return line.decode("utf-8").rstrip("\n")
 
-            if total_data.endswith(b'\n'):
-                break
+
+async def send(string_bytes, reader, writer, isMain=False):
+    # Send the data
+    writer.write(string_bytes)
+    await writer.drain()
+
+    if isMain:
+        try:
+            total_data = await reader.readuntil(b'\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            # Closed mid-line, a reply over the stream limit, or a reset
+            return False
 
         return total_data.decode("utf-8")
 
-def messaging(sock):
+async def messaging(stdin, reader, writer):
     while True:
-        userInput = input()
+        userInput = await read_input(stdin)
 
-        if userInput == "!quit":
+        if userInput is None or userInput == "!quit":
             return
         elif userInput == "!who":
-            getonline(sock)
+            await getonline(reader, writer)
             
 
         else:
 
-            handleInput = userInput.split(" ", 1)
+            dest_user, sep, message = userInput.partition(" ")
 
-            if(len(handleInput)):
-                dest_user, message = handleInput
+            if sep:
                 dest_user = dest_user.removeprefix('@')
                 string_bytes_message = f"SEND {dest_user} {message}\n".encode("utf-8")
 
-                send(string_bytes_message, sock, False)
+                await send(string_bytes_message, reader, writer, False)
 
             else:
                 print("Incorrect input !")
 
 
 
-def recieving(sock):
-    buffer = b""
-
+async def recieving(reader):
     while True:
-        rdlist, wrlist, exlist = select.select([sock], [], [])
-        for client in rdlist:
-
-            data = client.recv(1)
-            if not data:
-                return
+        try:
+            message_bytes = await reader.readuntil(b'\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            # Closed, possibly mid-line, a reply over the stream limit, or a reset
+            return
 
-            buffer += data
+        message = message_bytes.decode("utf-8")
 
-            while b'\n' in buffer:
+        if message.startswith("DELIVERY"):
 
-                message_bytes, buffer = buffer.split(b'\n', 1)
-                message = message_bytes.decode("utf-8") + '\n'
+            parts = message.split(" ", 2)
+            if len(parts) >= 3:
+                sender = parts[1]
+                content = parts[2].strip()
+                print(f"From {sender}: {content}")
+        elif message == "BAD-RQST-HDR\n":
+            print("Error: Unknown issue in previous message header.")
+        elif message == "BAD-RQST-BODY\n":
+            print("Error: Unknown issue in previous message body.")
 
-                if message.startswith("DELIVERY"):
+        elif message == "SEND-OK\n":
+            print("The message was sent successfully")
 
-                    parts = message.split(" ", 2)
-                    if len(parts) >= 3:
-                        sender = parts[1]
-                        content = parts[2].strip()
-                        print(f"From {sender}: {content}")
-                elif message == "BAD-RQST-HDR\n":
-                    print("Error: Unknown issue in previous message header.")
-                elif message == "BAD-RQST-BODY\n":
-                    print("Error: Unknown issue in previous message body.")
+        elif message == "BAD-DEST-USER\n":
+            print("The destination user does not exist")
 
-                elif message == "SEND-OK\n":
-                    print("The message was sent successfully")
+        elif "LIST-OK" in message:
+            users_str = message[8:].strip()
+            users = users_str.split(",")
+            print(f'There are {len(users)} online users:')
+            for user in users:
+                print(user)
 
-                elif message == "BAD-DEST-USER\n":
-                    print("The destination user does not exist")
 
-                elif "LIST-OK" in message:
-                    users_str = message[8:].strip()
-                    users = users_str.split(",")
-                    print(f'There are {len(users)} online users:')
-                    for user in users:
-                        print(user)
 
 
-
-
-def getonline(sock):
-    users = []
+async def getonline(reader, writer):
     string_bytes_get_users = f"LIST\n".encode("utf-8")
 
-    send(string_bytes_get_users, sock, False)
+    await send(string_bytes_get_users, reader, writer, False)
 
 
+async def run_client(host, port):
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+    sock = writer.get_extra_info("socket")
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 262144)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 262144)
 
-# Execute using `python -m a1_chat_client`
-def main() -> None:
-    args: Namespace = parse_arguments()
-    port: int = args.port
-    host: str = args.address
+    # connect_read_pipe switches stdin to non-blocking; the terminal gets it back as it was
+    stdin_fd = sys.stdin.fileno()
+    stdin_blocking = os.get_blocking(stdin_fd)
+    try:
+        await chat(reader, writer)
+    finally:
+        os.set_blocking(stdin_fd, stdin_blocking)
 
-    # TODO: Your implementation here
 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.connect((host, port))
+async def chat(reader, writer):
+    stdin = await open_stdin()
 
-    malformed = ['!','@','#','$','%','^','&','*']
+    malformed = frozenset('!@#$%^&*')
 
     # 1.)
     print("Welcome to Chat Client. Enter your login: ")
     authed = False
     while not authed:
 
-        username = input()
+        username = await read_input(stdin)
 
-        if username == "!quit":
+        if username is None or username == "!quit":
             break
         else:
-            found = False
-            for letter in username:
-                if letter in malformed:
-                    print(f"Cannot log in as {username}. That username contains disallowed characters.")
-                    found = True
+            found = not malformed.isdisjoint(username)
+            if found:
+                print(f"Cannot log in as {username}. That username contains disallowed characters.")
 
             if not found:
 
                 # Send Username to server
                 string_bytes_2 = f"HELLO-FROM {username}\n".encode("utf-8")
 
-                response_login_attempt = send(string_bytes_2,sock, True)
+                response_login_attempt = await send(string_bytes_2, reader, writer, True)
 
                 if not response_login_attempt:
                     print("Socket is closed")
+                    break
 
                 elif response_login_attempt == "IN-USE\n":
                     print(f"Cannot log in as {username}. That username is already in use. \n")
@@ -181,16 +191,42 @@ def main() -> None:
                 elif response_login_attempt == f"HELLO {username}\n":
                     print(f"Successfully logged in as {username}!")
                     authed = True
-                    t = threading.Thread(target=messaging, args=(sock,), daemon=False)
-                    t_2 = threading.Thread(target=recieving, args=(sock,), daemon=True)
 
-                    t.start()
-                    t_2.start()
+    if authed:
+        # Incoming messages are printed while we wait for user input
+        receiver = asyncio.create_task(recieving(reader))
+        sender = asyncio.create_task(messaging(stdin, reader, writer))
+        await asyncio.wait((receiver, sender), return_when=asyncio.FIRST_COMPLETED)
 
+        if receiver.done():
+            # The server went away; stop waiting for input
+            print("Disconnected from the server")
+            sender.cancel()
+        else:
+            # Half-close and let replies already on their way be printed before giving up on them
+            try:
+                if writer.can_write_eof():
+                    writer.write_eof()
+                await asyncio.wait_for(receiver, 1.0)
+            except (asyncio.TimeoutError, OSError):
+                pass
+            receiver.cancel()
+        await asyncio.gather(receiver, sender, return_exceptions=True)
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
 
-                    break
 
-    return
+# Execute using `python -m a1_chat_client`
+def main() -> None:
+    args: Namespace = parse_arguments()
+    port: int = args.port
+    host: str = args.address
+
+    asyncio.run(run_client(host, port))
 
 
 if __name__ == "__main__":
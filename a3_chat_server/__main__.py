@@ -1,14 +1,22 @@
 import logging
-import select
+import selectors
+import signal
 import socket
-import threading
 from argparse import ArgumentParser, Namespace
 
-running = True
 max_users = 16
-clients = {}  # username -> socket
-client_sockets = {}  # socket -> (username, authenticated)
-server_socket = None
+socket_buffer_size = 262144
+recv_buffer_size = 65536
+
+# Fixed protocol responses, encoded once
+BYTES_BAD_HDR = b"BAD-RQST-HDR\n"
+BYTES_BAD_BODY = b"BAD-RQST-BODY\n"
+BYTES_BAD_DEST = b"BAD-DEST-USER\n"
+BYTES_IN_USE = b"IN-USE\n"
+BYTES_BUSY = b"BUSY\n"
+BYTES_SEND_OK = b"SEND-OK\n"
+
+ILLEGAL_USERNAME_CHARS = b'!@#$%^&*, '
 
 
 logging.basicConfig(
@@ -38,206 +46,350 @@ def parse_arguments() -> Namespace:
     return parser.parse_args()
 
 
-def disconnect_client(client_socket: socket.socket) -> None:
-
-    global client_sockets
-    global clients
-
-    try:
-        username, _ = client_sockets.get(client_socket, (None, False))
-        if username:
-            del clients[username]
-            logger.info(f"User {username} disconnected")
-
-        if client_socket in client_sockets:
-            del client_sockets[client_socket]
-
-        client_socket.close()
-    except Exception as e:
-        logger.error(f"Error disconnecting client: {e}")
-
-
-def send_message(client_socket: socket.socket, message: str) -> None:
-
-    try:
-        message_bytes = message.encode('utf-8')
-        bytes_len = len(message_bytes)
-        bytes_sent = 0
-
-        while bytes_sent < bytes_len:
-            bytes_sent += client_socket.send(message_bytes[bytes_sent:])
-
-    except Exception as e:
-        logger.error(f"Error sending message: {e}")
-        disconnect_client(client_socket)
-
-
-def send_error(client_socket: socket.socket, error_message: str) -> None:
-    send_message(client_socket, error_message)
-
-
-def handle_hello_from(client_socket: socket.socket, parts: list, authenticated: bool) -> None:
-
-    global clients
-    global max_users
-    global client_sockets
-
-    if authenticated:
-        send_error(client_socket, "BAD-RQST-HDR\n")
-        return
-
-    if len(parts) != 2:
-        send_error(client_socket, "BAD-RQST-BODY\n")
-        return
-
-    username = parts[1].strip()
-
-    # Check for illegal characters
-    illegal_chars = '!@#$%^&*, '
-    if any(char in illegal_chars for char in username):
-        send_error(client_socket, "BAD-RQST-BODY\n")
-        return
-
-    # Check if username is already in use
-    if username in clients:
-        send_error(client_socket, "IN-USE\n")
-        return
-
-    # Check if server is full
-    if len(clients) >= max_users:
-        send_error(client_socket, "BUSY\n")
-        return
-
-    # Successfully authenticate user
-    clients[username] = client_socket
-    client_sockets[client_socket] = (username, True)
-    send_message(client_socket, f"HELLO {username}\n")
-    logger.info(f"User {username} authenticated")
-
-
-def handle_list(client_socket: socket.socket, authenticated: bool) -> None:
-
-    global clients
-
-    if not authenticated:
-        send_error(client_socket, "BAD-RQST-HDR\n")
-        return
-
-    user_list = ",".join(clients.keys())
-    send_message(client_socket, f"LIST-OK {user_list}\n")
-
-
-def handle_send(client_socket: socket.socket, parts: list, authenticated: bool) -> None:
-
-    global clients
-    global client_sockets
-
-    if not authenticated:
-        send_error(client_socket, "BAD-RQST-HDR\n")
-        return
-
-    if len(parts) != 2:
-        send_error(client_socket, "BAD-RQST-BODY\n")
-        return
-
-    # Split recipient and message
-    message_parts = parts[1].split(' ', 1)
-    if len(message_parts) != 2:
-        send_error(client_socket, "BAD-RQST-BODY\n")
-        return
-
-    dest_user, message = message_parts
-
-    # Check if message is empty or only whitespace
-    if not message.strip():
-        send_error(client_socket, "BAD-RQST-BODY\n")
-        return
-
-    # Check if destination user exists
-    if dest_user not in clients:
-        send_error(client_socket, "BAD-DEST-USER\n")
-        return
-
-    # Get sender username
-    sender_username, _ = client_sockets[client_socket]
-
-    # Send message to recipient
-    recipient_socket = clients[dest_user]
-    send_message(recipient_socket, f"DELIVERY {sender_username} {message}\n")
-
-    # Confirm to sender
-    send_message(client_socket, "SEND-OK\n")
-
-
-def process_message(client_socket: socket.socket, message: str) -> None:
-
-    username, authenticated = client_sockets.get(client_socket, (None, False))
-
-    # Split message into command and parameters
-    parts = message.split(' ', 1)
-    if not parts:
-        send_error(client_socket, "BAD-RQST-HDR\n")
-        return
-
-    command = parts[0]
-
-    if command == "HELLO-FROM":
-        handle_hello_from(client_socket, parts, authenticated)
-    elif command == "LIST":
-        handle_list(client_socket, authenticated)
-    elif command == "SEND":
-        handle_send(client_socket, parts, authenticated)
-    else:
-        send_error(client_socket, "BAD-RQST-HDR\n")
+class ClientState:
+    # Per-connection state, attached to the client's selector key
+    __slots__ = ('sock', 'username', 'username_bytes', 'authenticated',
+                 'buffer', 'read_pos', 'write_pos', 'send_buffer')
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.username = None
+        self.username_bytes = None
+        self.authenticated = False
+        # Received bytes live in buffer[read_pos:write_pos]; recv_into fills it in place
+        self.buffer = bytearray(recv_buffer_size)
+        self.read_pos = 0
+        self.write_pos = 0
+        self.send_buffer = bytearray()
+
+
+def configure_client_socket(client_socket: socket.socket) -> None:
+
+    # Small protocol frames should go out immediately instead of waiting on Nagle
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, socket_buffer_size)
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, socket_buffer_size)
+    client_socket.setblocking(False)
+
+
+class ChatServer:
+    __slots__ = ('host', 'port', 'clients', 'server_socket', 'running', 'selector', 'dispatch',
+                 'wakeup_r', 'wakeup_w')
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.clients = {}  # username -> ClientState
+        self.server_socket = None
+        self.running = True
+        self.selector = None
+        # Self-pipe used to wake the event loop on shutdown
+        self.wakeup_r, self.wakeup_w = socket.socketpair()
+        self.wakeup_r.setblocking(False)
+        self.wakeup_w.setblocking(False)
+        self.dispatch = {
+            b"HELLO-FROM": self.handle_hello_from,
+            b"LIST": self.handle_list,
+            b"SEND": self.handle_send,
+        }
+
+    def start(self) -> None:
+        """Start the chat server."""
+        try:
+            server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket = server_socket
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            server_socket.bind((self.host, self.port))
+            server_socket.listen(5)
+            logger.info(f"Server started on {self.host} port {self.port}")
+
+            selector = selectors.DefaultSelector()
+            self.selector = selector
+            selector.register(server_socket, selectors.EVENT_READ, data=None)
+            selector.register(self.wakeup_r, selectors.EVENT_READ, data=None)
+
+            signal.signal(signal.SIGINT, self.handle_signal)
+            signal.signal(signal.SIGTERM, self.handle_signal)
+
+            accept_client = self.accept_client
+            handle_client = self.handle_client
+            flush_client = self.flush_client
+
+            while self.running:
+                for key, mask in selector.select(timeout=None):
+                    state = key.data
+                    if state is None:
+                        if key.fileobj is server_socket:
+                            accept_client()
+                        else:
+                            self.drain_wakeup()
+                        continue
+
+                    if mask & selectors.EVENT_READ and state.sock.fileno() != -1:
+                        handle_client(state)
+                    if mask & selectors.EVENT_WRITE and state.sock.fileno() != -1:
+                        flush_client(state)
+
+        except KeyboardInterrupt:
+            logger.info("Server shutting down...")
+        except Exception as e:
+            logger.error(f"Server error: {e}")
+        finally:
+            self.cleanup()
 
+    def stop(self) -> None:
+        """Ask the event loop to exit and wake it up."""
+        self.running = False
+        try:
+            self.wakeup_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
 
-def handle_client(client_socket: socket.socket) -> None:
+    def handle_signal(self, signum, frame) -> None:
+        logger.info("Server shutting down...")
+        self.stop()
 
-    global running
-    global client_sockets
+    def drain_wakeup(self) -> None:
+        try:
+            while self.wakeup_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def cleanup(self) -> None:
+        """Clean up server resources."""
+        self.running = False
+        if self.selector:
+            for key in list(self.selector.get_map().values()):
+                if key.data is None:
+                    continue
+                try:
+                    key.data.sock.close()
+                except Exception as e:
+                    logger.error(f"Error closing client socket: {e}")
+            self.selector.close()
+        if self.server_socket:
+            self.server_socket.close()
+        self.wakeup_r.close()
+        self.wakeup_w.close()
+
+    def accept_client(self) -> None:
+        """Accept a pending connection and register it with the selector."""
+        client_socket, address = self.server_socket.accept()
+        logger.info(f"New connection from {address}")
+        configure_client_socket(client_socket)
+        self.selector.register(client_socket, selectors.EVENT_READ, data=ClientState(client_socket))
+
+    def handle_client(self, state: ClientState) -> None:
+        """Read from a readable client and process every complete message."""
+        buffer = state.buffer
+        read_pos = state.read_pos
+        write_pos = state.write_pos
+        process_message = self.process_message
 
-    buffer = b''
+        try:
+            if write_pos == len(buffer):
+                if read_pos:
+                    # Make room by moving the partial frame to the front
+                    buffer[:write_pos - read_pos] = buffer[read_pos:write_pos]
+                    write_pos -= read_pos
+                    read_pos = 0
+                else:
+                    # A single frame has filled the whole buffer
+                    buffer.extend(bytes(len(buffer)))
+                state.read_pos = read_pos
+                state.write_pos = write_pos
 
-    try:
-        while running:
             try:
-                data = client_socket.recv(1)
-                if not data:
-                    break
+                with memoryview(buffer) as view:
+                    received = state.sock.recv_into(view[write_pos:])
+            except BlockingIOError:
+                return
+            if not received:
+                self.disconnect_client(state)
+                return
+
+            # Only the newly received bytes can contain a new frame end
+            end = buffer.rfind(b'\n', write_pos, write_pos + received)
+            write_pos += received
+            state.write_pos = write_pos
+            if end == -1:
+                return
+
+            # Cut every complete frame out of the buffer in one split, keeping the partial tail
+            with memoryview(buffer) as view:
+                messages = view[read_pos:end].tobytes().split(b'\n')
+
+            # Advance the cursor instead of shifting the tail on every read; compact only
+            # once the consumed prefix outweighs what is left
+            read_pos = end + 1
+            if read_pos == write_pos:
+                read_pos = write_pos = 0
+            elif read_pos > len(buffer) // 2:
+                buffer[:write_pos - read_pos] = buffer[read_pos:write_pos]
+                write_pos -= read_pos
+                read_pos = 0
+            state.read_pos = read_pos
+            state.write_pos = write_pos
+
+            for message in messages:
+                process_message(state, message)
+
+                # A failed send may have disconnected this client mid-batch
+                if state.sock.fileno() == -1:
+                    return
 
-                buffer += data
-
-                while b'\n' in buffer:
-                    message, buffer = buffer.split(b'\n', 1)
-                    message = message.decode('utf-8')
-                    process_message(client_socket, message)
+        except Exception as e:
+            logger.error(f"Error handling client: {e}")
+            self.disconnect_client(state)
+
+    def process_message(self, state: ClientState, message: bytes) -> None:
+        """Process a message from a client."""
+        # Split message into command and parameters; a command without a space has no body
+        command, sep, body = message.partition(b' ')
+
+        self.dispatch.get(command, self.bad_request_header)(state, body if sep else None)
+
+    def bad_request_header(self, state: ClientState, body: bytes | None) -> None:
+        """Reject an unknown command."""
+        self.send_error(state, BYTES_BAD_HDR)
+
+    def handle_hello_from(self, state: ClientState, body: bytes | None) -> None:
+        """Handle HELLO-FROM login request."""
+        clients = self.clients
+
+        if state.authenticated:
+            self.send_error(state, BYTES_BAD_HDR)
+            return
+
+        if body is None:
+            self.send_error(state, BYTES_BAD_BODY)
+            return
+
+        username_bytes = body.strip()
+
+        # Check for illegal characters: translate drops them, so any loss in length means one was present
+        if len(username_bytes.translate(None, ILLEGAL_USERNAME_CHARS)) != len(username_bytes):
+            self.send_error(state, BYTES_BAD_BODY)
+            return
+
+        username = username_bytes.decode('utf-8')
+
+        # Check if username is already in use
+        if username in clients:
+            self.send_error(state, BYTES_IN_USE)
+            return
+
+        # Check if server is full
+        if len(clients) >= max_users:
+            self.send_error(state, BYTES_BUSY)
+            return
+
+        # Successfully authenticate user
+        clients[username] = state
+        state.username = username
+        state.username_bytes = username_bytes
+        state.authenticated = True
+        self.send_message(state, b"HELLO " + username_bytes + b"\n")
+        logger.info(f"User {username} authenticated")
+
+    def handle_list(self, state: ClientState, body: bytes | None) -> None:
+        """Handle LIST request for online users."""
+        if not state.authenticated:
+            self.send_error(state, BYTES_BAD_HDR)
+            return
+
+        user_list = b",".join([client.username_bytes for client in self.clients.values()])
+        self.send_message(state, b"LIST-OK " + user_list + b"\n")
+
+    def handle_send(self, state: ClientState, body: bytes | None) -> None:
+        """Handle SEND message request."""
+        if not state.authenticated:
+            self.send_error(state, BYTES_BAD_HDR)
+            return
+
+        if body is None:
+            self.send_error(state, BYTES_BAD_BODY)
+            return
+
+        # Split recipient and message
+        dest_user, sep, message = body.partition(b' ')
+        if not sep:
+            self.send_error(state, BYTES_BAD_BODY)
+            return
+
+        # Check if message is empty or only whitespace
+        if not message.strip():
+            self.send_error(state, BYTES_BAD_BODY)
+            return
+
+        # Check if destination user exists
+        recipient = self.clients.get(dest_user.decode('utf-8'))
+        if recipient is None:
+            self.send_error(state, BYTES_BAD_DEST)
+            return
+
+        send_message = self.send_message
+
+        # Send message to recipient
+        send_message(recipient, b"DELIVERY " + state.username_bytes + b" " + message + b"\n")
+
+        # Confirm to sender
+        send_message(state, BYTES_SEND_OK)
+
+    def send_message(self, state: ClientState, message: bytes) -> None:
+        """Queue a message for a client and try to send it right away."""
+        send_buffer = state.send_buffer
+        if send_buffer:
+            # Already waiting for EVENT_WRITE, flush_client will pick this up
+            send_buffer.extend(message)
+            return
+
+        send_buffer.extend(message)
+        try:
+            sent = state.sock.send(send_buffer)
+        except BlockingIOError:
+            sent = 0
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            self.disconnect_client(state)
+            return
 
-            except socket.timeout:
-                continue
-            except Exception as e:
-                logger.error(f"Error handling client: {e}")
-                break
+        del send_buffer[:sent]
+        if send_buffer:
+            self.selector.modify(state.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, data=state)
 
-    except Exception as e:
-        logger.error(f"Client handler error: {e}")
-    finally:
-        disconnect_client(client_socket)
+    def flush_client(self, state: ClientState) -> None:
+        """Send as much of a client's pending output as the socket accepts."""
+        send_buffer = state.send_buffer
+        try:
+            sent = state.sock.send(send_buffer)
+        except BlockingIOError:
+            return
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            self.disconnect_client(state)
+            return
 
+        del send_buffer[:sent]
+        if not send_buffer:
+            self.selector.modify(state.sock, selectors.EVENT_READ, data=state)
 
-def cleanup() -> None:
+    def send_error(self, state: ClientState, error_message: bytes) -> None:
+        """Send an error message to a client."""
+        self.send_message(state, error_message)
 
-    global running
-    global client_sockets
-    global server_socket
+    def disconnect_client(self, state: ClientState) -> None:
+        """Disconnect a client and clean up."""
+        # Already closed, e.g. by a failed send earlier in the same event batch
+        if state.sock.fileno() == -1:
+            return
 
-    running = False
-    if server_socket:
-        server_socket.close()
-    for client_socket in list(client_sockets.keys()):
-        try:
-            client_socket.close()
-        except Exception as e:
-            logger.error(f"Error closing client socket: {e}")
+        self.selector.unregister(state.sock)
+        if self.clients.pop(state.username, None) is not None:
+            logger.info(f"User {state.username} disconnected")
+        state.sock.close()
 
 
 # Execute using `python -m a3_chat_server`
@@ -246,33 +398,9 @@ def main() -> None:
     port: int = args.port
     host: str = args.address
 
-    global server_socket
-    global running
-    global client_sockets
-
-    # Start the chat server
-    try:
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_socket.bind((host, port))
-        server_socket.listen(5)
-        logger.info(f"Server started on {host} port {port}")
-
-        while running:
-            readable, _, _ = select.select([server_socket], [], [], 1)
-            for sock in readable:
-                if sock == server_socket:
-                    client_socket, address = server_socket.accept()
-                    logger.info(f"New connection from {address}")
-                    client_sockets[client_socket] = (None, False)
-                    threading.Thread(target=handle_client, args=(client_socket,), daemon=True).start()
-
-    except KeyboardInterrupt:
-        logger.info("Server shutting down...")
-    except Exception as e:
-        logger.error(f"Server error: {e}")
-    finally:
-        cleanup()
+    # Create and start the chat server
+    server = ChatServer(host, port)
+    server.start()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,6 @@
 from argparse import Namespace, ArgumentParser
 import socket
-import threading
-import select
+import selectors
 import logging
 
 # Configure logging
@@ -11,6 +10,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+RECEIVE_CHUNK = 4096
+# Report a vanished peer as an exception instead of a SIGPIPE, where the platform supports it
+SEND_FLAGS = getattr(socket, 'MSG_NOSIGNAL', 0)
+# Translation table that deletes every character not allowed in a username
+ILLEGAL_USER_CHARS = str.maketrans('', '', '!@#$%^&* ')
+
 
 def parse_arguments() -> Namespace:
     """
@@ -42,6 +47,13 @@ class ChatServer:
         self.client_sockets = {}  # socket -> (username, authenticated)
         self.max_users = 16
         self.running = True
+        self.sel = None
+        self.user_list_bytes = None  # encoded LIST-OK reply, rebuilt after a login or logout
+        self.dispatch = {
+            "HELLO-FROM": self.handle_hello_from,
+            "LIST": self.handle_list,
+            "SEND": self.handle_send,
+        }
 
     def start(self):
         """Start the chat server."""
@@ -52,14 +64,25 @@ class ChatServer:
             self.server_socket.listen(5)
             logger.info(f"Server started on {self.host}:{self.port}")
 
+            self.sel = selectors.DefaultSelector()
+            self.sel.register(self.server_socket, selectors.EVENT_READ, data=None)
+
+            select = self.sel.select
+            accept_client = self.accept_client
+            handle_client = self.handle_client
+            client_sockets = self.client_sockets
+
+            flush_client = self.flush_client
+
             while self.running:
-                readable, _, _ = select.select([self.server_socket], [], [], 1)
-                for sock in readable:
-                    if sock == self.server_socket:
-                        client_socket, address = self.server_socket.accept()
-                        logger.info(f"New connection from {address}")
-                        self.client_sockets[client_socket] = (None, False)
-                        threading.Thread(target=self.handle_client, args=(client_socket,), daemon=True).start()
+                for key, mask in select(timeout=None):
+                    if key.data is None:
+                        accept_client()
+                        continue
+                    if mask & selectors.EVENT_READ and key.fileobj in client_sockets:
+                        handle_client(key.fileobj, key.data)
+                    if mask & selectors.EVENT_WRITE and key.fileobj in client_sockets:
+                        flush_client(key.fileobj, key.data)
 
         except KeyboardInterrupt:
             logger.info("Server shutting down...")
@@ -71,6 +94,8 @@ class ChatServer:
     def cleanup(self):
         """Clean up server resources."""
         self.running = False
+        if self.sel:
+            self.sel.close()
         if self.server_socket:
             self.server_socket.close()
         for client_socket in list(self.client_sockets.keys()):
@@ -79,34 +104,74 @@ class ChatServer:
             except:
                 pass
 
-    def handle_client(self, client_socket):
-        """Handle communication with a single client."""
-        buffer = b''
+    def accept_client(self):
+        """Accept a new connection and register it with the selector."""
+        client_socket, address = self.server_socket.accept()
+        logger.info(f"New connection from {address}")
+        client_socket.setblocking(False)
+        # Replies are tiny, send them immediately instead of waiting on Nagle
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.client_sockets[client_socket] = (None, False)
+        # buf[start:end] holds unparsed input, out holds bytes the kernel has not taken yet
+        state = {'buf': bytearray(RECEIVE_CHUNK), 'start': 0, 'end': 0, 'out': bytearray()}
+        self.sel.register(client_socket, selectors.EVENT_READ, data=state)
+
+    def handle_client(self, client_socket, state):
+        """Handle a read-ready client socket."""
+        client_sockets = self.client_sockets
+        process_message = self.process_message
+        buf = state['buf']
+        start = state['start']
+        end = state['end']
 
         try:
-            while self.running:
-                try:
-                    data = client_socket.recv(1)
-                    if not data:
-                        break
-
-                    buffer += data
-
-                    # Process complete messages (ending with \n)
-                    while b'\n' in buffer:
-                        message, buffer = buffer.split(b'\n', 1)
-                        message = message.decode('utf-8')
-                        self.process_message(client_socket, message)
-
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    logger.error(f"Error handling client: {e}")
+            if end == len(buf):
+                if start > 0:
+                    # Move the partial message to the front instead of growing
+                    del buf[:start]
+                    buf.extend(bytes(start))
+                    end -= start
+                    start = 0
+                else:
+                    buf.extend(bytes(RECEIVE_CHUNK))
+                # Keep the cursors in step with the buffer even if nothing is received
+                state['start'] = start
+                state['end'] = end
+
+            try:
+                # Release the view at once; a live export would block resizing buf later
+                with memoryview(buf) as view:
+                    n = client_socket.recv_into(view[end:])
+            except BlockingIOError:
+                return
+            if not n:
+                self.disconnect_client(client_socket)
+                return
+
+            # Only the new bytes can contain a terminator not yet seen
+            scan = end
+            end += n
+
+            # Process complete messages (ending with \n), keep the remainder for the next read
+            while True:
+                nl = buf.find(b'\n', scan, end)
+                if nl < 0:
                     break
+                message = buf[start:nl].decode('utf-8')
+                start = scan = nl + 1
+                process_message(client_socket, message)
+
+                # A failed send may have disconnected this client
+                if client_socket not in client_sockets:
+                    return
+
+            if start == end:
+                start = end = 0
+            state['start'] = start
+            state['end'] = end
 
         except Exception as e:
-            logger.error(f"Client handler error: {e}")
-        finally:
+            logger.error(f"Error handling client: {e}")
             self.disconnect_client(client_socket)
 
     def process_message(self, client_socket, message):
@@ -119,16 +184,12 @@ class ChatServer:
             self.send_error(client_socket, "BAD-RQST-HDR\n")
             return
 
-        command = parts[0]
-
-        if command == "HELLO-FROM":
-            self.handle_hello_from(client_socket, parts, authenticated)
-        elif command == "LIST":
-            self.handle_list(client_socket, authenticated)
-        elif command == "SEND":
-            self.handle_send(client_socket, parts, authenticated)
-        else:
+        handler = self.dispatch.get(parts[0])
+        if handler is None:
             self.send_error(client_socket, "BAD-RQST-HDR\n")
+            return
+
+        handler(client_socket, parts, authenticated)
 
     def handle_hello_from(self, client_socket, parts, authenticated):
         """Handle HELLO-FROM login request."""
@@ -143,8 +204,7 @@ class ChatServer:
         username = parts[1].strip()
 
         # Check for illegal characters
-        illegal_chars = '!@#$%^&* '
-        if any(char in illegal_chars for char in username):
+        if len(username.translate(ILLEGAL_USER_CHARS)) != len(username):
             self.send_error(client_socket, "BAD-RQST-BODY\n")
             return
 
@@ -160,18 +220,20 @@ class ChatServer:
 
         # Successfully authenticate user
         self.clients[username] = client_socket
+        self.user_list_bytes = None
         self.client_sockets[client_socket] = (username, True)
         self.send_message(client_socket, f"HELLO {username}\n")
         logger.info(f"User {username} authenticated")
 
-    def handle_list(self, client_socket, authenticated):
+    def handle_list(self, client_socket, parts, authenticated):
         """Handle LIST request for online users."""
         if not authenticated:
             self.send_error(client_socket, "BAD-RQST-HDR\n")
             return
 
-        user_list = ",".join(self.clients.keys())
-        self.send_message(client_socket, f"LIST-OK {user_list}\n")
+        if self.user_list_bytes is None:
+            self.user_list_bytes = b"LIST-OK " + ",".join(self.clients).encode('utf-8') + b"\n"
+        self.send_bytes(client_socket, self.user_list_bytes)
 
     def handle_send(self, client_socket, parts, authenticated):
         """Handle SEND message request."""
@@ -213,13 +275,42 @@ class ChatServer:
 
     def send_message(self, client_socket, message):
         """Send a message to a client."""
+        self.send_bytes(client_socket, message.encode('utf-8'))
+
+    def send_bytes(self, client_socket, data):
+        """Send encoded data to a client, queueing whatever the kernel does not accept."""
         try:
-            message_bytes = message.encode('utf-8')
-            bytes_len = len(message_bytes)
-            bytes_sent = 0
+            state = self.sel.get_key(client_socket).data
+            out = state['out']
+
+            # Keep ordering: once something is queued, everything goes behind it
+            if out:
+                out += data
+                return
 
-            while bytes_sent < bytes_len:
-                bytes_sent += client_socket.send(message_bytes[bytes_sent:])
+            try:
+                sent = client_socket.send(data, SEND_FLAGS)
+            except BlockingIOError:
+                sent = 0
+            if sent < len(data):
+                out += data[sent:]
+                self.sel.modify(client_socket, selectors.EVENT_READ | selectors.EVENT_WRITE, state)
+
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            self.disconnect_client(client_socket)
+
+    def flush_client(self, client_socket, state):
+        """Write queued output to a write-ready client socket."""
+        out = state['out']
+        try:
+            try:
+                sent = client_socket.send(out, SEND_FLAGS)
+            except BlockingIOError:
+                return
+            del out[:sent]
+            if not out:
+                self.sel.modify(client_socket, selectors.EVENT_READ, state)
 
         except Exception as e:
             logger.error(f"Error sending message: {e}")
@@ -235,10 +326,12 @@ class ChatServer:
             username, _ = self.client_sockets.get(client_socket, (None, False))
             if username:
                 del self.clients[username]
+                self.user_list_bytes = None
                 logger.info(f"User {username} disconnected")
 
             if client_socket in self.client_sockets:
                 del self.client_sockets[client_socket]
+                self.sel.unregister(client_socket)
 
             client_socket.close()
         except Exception as e:
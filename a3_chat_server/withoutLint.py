@@ -188,7 +188,7 @@ def handle_client(client_socket):
     global running
     global client_sockets
 
-    buffer = b''
+    buffer = bytearray()
 
     try:
         while running:
@@ -197,13 +197,15 @@ def handle_client(client_socket):
                 if not data:
                     break
 
-                buffer += data
+                buffer.extend(data)
 
                 # Process complete messages (ending with \n)
-                while b'\n' in buffer:
-                    message, buffer = buffer.split(b'\n', 1)
-                    message = message.decode('utf-8')
+                idx = buffer.find(b'\n')
+                while idx != -1:
+                    message = bytes(buffer[:idx]).decode('utf-8')
+                    del buffer[:idx + 1]
                     process_message(client_socket, message)
+                    idx = buffer.find(b'\n')
 
             except socket.timeout:
                 continue
@@ -1,18 +1,119 @@
 import socket
 import os
+import stat
 import threading
-import datetime
+import time
 import mimetypes
 import signal
 import sys
+import selectors
+import queue
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote
 from argparse import Namespace, ArgumentParser
 
 host: str='0.0.0.0'
 port: int =8000
 base_directory: str='a5_http_server/public'
+# Resolved document root, computed once in main() for the traversal check
+root_real: str=''
 server_socket = None
 is_running = False
+worker_pool = None
+# Signal handlers only write here; the accept loop wakes up and stops on its own thread
+wakeup_r = None
+wakeup_w = None
+# Keep-alive connections handed back by workers, and when each idle one gets closed
+parked_clients = deque()
+idle_deadlines = {}
+idle_timeout = 10.0
+request_buffer_size = 8192
+# Bounded number of requests served at once; idle keep-alive connections do not hold a worker
+max_workers = min(32, (os.cpu_count() or 1) * 4)
+# TCP_CORK is Linux only
+use_cork = hasattr(socket, 'TCP_CORK')
+# Date line for the second in date_cache_ts, shared by all workers
+date_cache_ts = 0
+date_cache_line = b''
+
+STATUS_LINES = {
+    200: b'HTTP/1.1 200 OK\r\n',
+    201: b'HTTP/1.1 201 Created\r\n',
+    400: b'HTTP/1.1 400 Bad Request\r\n',
+    404: b'HTTP/1.1 404 Not Found\r\n',
+    500: b'HTTP/1.1 500 Internal Server Error\r\n'
+}
+SERVER_HEADER = b'Server: PythonHTTP/1.1\r\n'
+CONNECTION_KEEP_ALIVE = b'Connection: keep-alive\r\n\r\n'
+CONNECTION_CLOSE = b'Connection: close\r\n\r\n'
+
+# Looked up before mimetypes, which is slower and depends on the host's registry
+CONTENT_TYPES = {
+    '.html': 'text/html',
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+    '.jpeg': 'image/jpeg',
+    '.jpg': 'image/jpeg',
+    '.png': 'image/png',
+    '.pdf': 'application/pdf'
+}
+
+# Small static files are kept in memory, keyed on path and validated against mtime and size
+file_cache = OrderedDict()  # file_path -> (mtime_ns, size, content, content_type)
+file_cache_lock = threading.Lock()
+# Decoded URL path -> resolved file path, only for paths that passed the root check
+resolved_paths = OrderedDict()
+max_cache_entries = 64
+max_cached_file_size = 1024 * 1024
+max_resolved_paths = 1024
+
+
+class ConnCtx:
+    """Receive buffer and header dict for one request, reused by the workers."""
+
+    def __init__(self):
+        self.recv_buf = bytearray(request_buffer_size)
+        self.view = memoryview(self.recv_buf)
+        self.headers = {}
+
+    def grow(self):
+        # A bytearray cannot be resized while a view of it exists
+        self.view.release()
+        self.recv_buf.extend(bytes(request_buffer_size))
+        self.view = memoryview(self.recv_buf)
+
+    def reset(self):
+        # Give back whatever an oversized request head added and forget its headers
+        if len(self.recv_buf) > request_buffer_size:
+            self.view.release()
+            del self.recv_buf[request_buffer_size:]
+            self.view = memoryview(self.recv_buf)
+        self.headers.clear()
+
+
+# Contexts not in use; filled with one per worker in startServer()
+free_contexts = queue.LifoQueue()
+
+def render_error_page(status_code, status_message):
+    return f"""\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{status_code} {status_message}</title>
+</head>
+<body>
+    <h1>{status_code} {status_message}</h1>
+    <p>Sorry, an error occurred while processing your request.</p>
+</body>
+</html>""".encode("utf-8")
+
+# Built-in pages used when the document root has no custom <code>.html
+ERROR_PAGES = {
+    code: render_error_page(code, message)
+    for code, message in ((400, "Bad Request"), (404, "Not Found"), (500, "Internal Server Error"))
+}
 
 
 def parse_arguments() -> Namespace:
@@ -39,74 +140,71 @@ def parse_arguments() -> Namespace:
 
     return parser.parse_args()
 
-def parse_request(request_data):
-
-    request = {}
+def parse_request(request_data, request=None):
 
-    # Split the request -> into lines
-    lines = request_data.decode('utf-8', errors='replace').split('\r\n')
+    if request is None:
+        request = {}
 
-    if not lines:
-        return request
+    # Headers are ASCII, so split the raw bytes and decode only the path
+    head, _, _ = request_data.partition(b'\r\n\r\n')
+    lines = head.split(b'\r\n')
 
     # Parse the request line
-    request_line_parts = lines[0].split(' ')
+    request_line_parts = lines[0].split(b' ')
     if len(request_line_parts) >= 3:
         request['method'] = request_line_parts[0]
-        request['path'] = unquote(request_line_parts[1])
+        request['path'] = unquote(request_line_parts[1].decode('utf-8', errors='replace'))
         request['version'] = request_line_parts[2]
 
-        # Parse the headers
-        for i in range(1, len(lines)):
-            line = lines[i]
-            if not line:  # Empty line indicates end of headers
-                break
-
-            if ':' in line:
-                key, value = line.split(':', 1)
-                request[key.strip()] = value.strip()
+        # Parse the headers; names are stored lowercased as bytes
+        for line in lines[1:]:
+            key, sep, value = line.partition(b':')
+            if sep:
+                request[key.strip().lower()] = value.strip()
 
     return request
 
+def get_date_header():
+    global date_cache_ts
+    global date_cache_line
+
+    now = int(time.time())
+    if now != date_cache_ts:
+        # Two threads may both refresh at a second boundary; they compute the same value
+        date_cache_line = time.strftime('Date: %a, %d %b %Y %H:%M:%S GMT\r\n', time.gmtime(now)).encode('ascii')
+        date_cache_ts = now
+    return date_cache_line
+
+def build_headers(status_code, content_length, content_type, keep_alive=False):
+
+    status_line = STATUS_LINES.get(status_code)
+    if status_line is None:
+        status_line = b'HTTP/1.1 %d Unknown\r\n' % status_code
+
+    # Only the date, length and type vary; everything else is pre-encoded
+    return b''.join([
+        status_line,
+        get_date_header(),
+        SERVER_HEADER,
+        b'Content-Length: %d\r\n' % content_length,
+        b'Content-Type: ' + content_type.encode('ascii') + b'; charset=utf-8\r\n',
+        CONNECTION_KEEP_ALIVE if keep_alive else CONNECTION_CLOSE
+    ])
+
 def send_response(client_socket, status_code, content, content_type, keep_alive=False):
 
-    status_message = {
-        200: 'OK',
-        201: 'Created',
-        400: 'Bad Request',
-        404: 'Not Found',
-        500: 'Internal Server Error'
-    }.get(status_code, 'Unknown')
-
-    # Build the response headers
-    headers = [
-        f"HTTP/1.1 {status_code} {status_message}",
-        f"Date: {datetime.datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')}",
-        f"Server: PythonHTTP/1.1",
-        f"Content-Length: {len(content)}",
-        f"Content-Type: {content_type}; charset=utf-8"
-    ]
-
-    if keep_alive:
-        headers.append("Connection: keep-alive")
-    else:
-        headers.append("Connection: close")
-
-    # Join headers and add empty line
-    header_bytes = '\r\n'.join(headers).encode('utf-8') + b'\r\n\r\n'
-
-    # Send headers
-    client_socket.send(header_bytes)
-
-    # Send content in chunks to avoid using sendall()
-    content_length = len(content)
-    offset = 0
-    chunk_size = 4096
-
-    while offset < content_length:
-        end = min(offset + chunk_size, content_length)
-        client_socket.send(content[offset:end])
-        offset = end
+    header_bytes = build_headers(status_code, len(content), content_type, keep_alive)
+
+    # Gather header and body into a single sendmsg call
+    header_length = len(header_bytes)
+    sent = client_socket.sendmsg([header_bytes, content])
+
+    # On a short write, finish whatever part the kernel did not take
+    if sent < header_length:
+        client_socket.sendall(memoryview(header_bytes)[sent:])
+        sent = header_length
+    if sent - header_length < len(content):
+        client_socket.sendall(memoryview(content)[sent - header_length:])
 
 def send_error_response(client_socket, status_code, keep_alive=False):
 
@@ -115,10 +213,20 @@ def send_error_response(client_socket, status_code, keep_alive=False):
     error_file_name = f"{status_code}.html"
     error_file_path = os.path.join(base_directory, error_file_name)
 
-    if os.path.isfile(error_file_path):
+    try:
+        st = os.stat(error_file_path)
+    except OSError:
+        st = None
+
+    if st is not None and stat.S_ISREG(st.st_mode):
+        cached = get_cached_file(error_file_path, st)
+        if cached is not None:
+            send_response(client_socket, status_code, cached[2], "text/html", keep_alive)
+            return
         try:
             with open(error_file_path, "rb") as f:
                 content = f.read()
+            store_cached_file(error_file_path, st, content, "text/html")
             # Serve the custom page
             send_response(client_socket, status_code, content, "text/html", keep_alive)
             return
@@ -126,38 +234,70 @@ def send_error_response(client_socket, status_code, keep_alive=False):
             # If reading the custom page fails, fall back to generic page
             print(f"Could not read custom error page {error_file_path}: {exc}")
 
-    status_message = {
-        400: "Bad Request",
-        404: "Not Found",
-        500: "Internal Server Error"
-    }.get(status_code, "Unknown Error")
-
-    content = f"""\
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <title>{status_code} {status_message}</title>
-</head>
-<body>
-    <h1>{status_code} {status_message}</h1>
-    <p>Sorry, an error occurred while processing your request.</p>
-</body>
-</html>""".encode("utf-8")
+    content = ERROR_PAGES.get(status_code)
+    if content is None:
+        content = render_error_page(status_code, "Unknown Error")
 
     send_response(client_socket, status_code, content, "text/html", keep_alive)
 
+def get_cached_file(file_path, st):
+    """Return the cached (mtime_ns, size, content, content_type) entry if it is still current."""
+    with file_cache_lock:
+        cached = file_cache.get(file_path)
+        if cached is not None:
+            file_cache.move_to_end(file_path)
+
+    if cached is None or cached[0] != st.st_mtime_ns or cached[1] != st.st_size:
+        return None
+    return cached
+
+def store_cached_file(file_path, st, content, content_type):
+    with file_cache_lock:
+        file_cache[file_path] = (st.st_mtime_ns, st.st_size, content, content_type)
+        file_cache.move_to_end(file_path)
+        if len(file_cache) > max_cache_entries:
+            file_cache.popitem(last=False)
+
 
 def handle_get_request(client_socket, request):
 
-    global base_directory
+    global root_real
 
 
     raw_path = request.get("path", "/")
     path = raw_path if raw_path.startswith("/") else "/" + raw_path
 
-    file_path = os.path.normpath(os.path.join(base_directory, path.lstrip("/")))
+    with file_cache_lock:
+        file_path = resolved_paths.get(path)
+        if file_path is not None:
+            resolved_paths.move_to_end(path)
 
+    if file_path is None:
+        # A NUL cannot name a file and makes realpath raise, so refuse it before resolving
+        if "\x00" in path:
+            send_error_response(
+                client_socket,
+                400,
+                request.get(b"connection", b"").lower() == b"keep-alive"
+            )
+            return
+
+        # Resolved once per path; repeat requests skip realpath's per-component lstat calls
+        file_path = os.path.realpath(os.path.join(root_real, path.lstrip("/")))
+
+        # Anything resolving outside the document root, through '..' or a symlink, is refused
+        if file_path != root_real and not file_path.startswith(root_real + os.sep):
+            send_error_response(
+                client_socket,
+                400,
+                request.get(b"connection", b"").lower() == b"keep-alive"
+            )
+            return
+
+        with file_cache_lock:
+            resolved_paths[path] = file_path
+            if len(resolved_paths) > max_resolved_paths:
+                resolved_paths.popitem(last=False)
 
     if os.path.isdir(file_path):
         index_path = os.path.join(file_path, "index.html")
@@ -168,7 +308,7 @@ def handle_get_request(client_socket, request):
             send_error_response(
                 client_socket,
                 404,
-                request.get("Connection", "").lower() == "keep-alive"
+                request.get(b"connection", b"").lower() == b"keep-alive"
             )
             return
 
@@ -176,107 +316,187 @@ def handle_get_request(client_socket, request):
         send_error_response(
             client_socket,
             404,
-            request.get("Connection", "").lower() == "keep-alive"
+            request.get(b"connection", b"").lower() == b"keep-alive"
         )
         return
 
-    content_type, _ = mimetypes.guess_type(file_path)
-    if content_type is None:
-        content_type = "application/octet-stream"
+    keep_alive = request.get(b"connection", b"").lower() == b"keep-alive"
 
     try:
-        with open(file_path, "rb") as f:
-            content = f.read()
-
-        send_response(
-            client_socket,
-            200,
-            content,
-            content_type,
-            request.get("Connection", "").lower() == "keep-alive"
-        )
-
+        st = os.stat(file_path)
+        cached = get_cached_file(file_path, st)
+
+        if cached is None:
+            content_type = CONTENT_TYPES.get(os.path.splitext(file_path)[1].lower())
+            if content_type is None:
+                # Unknown extension, fall back to the full mimetypes registry
+                content_type, _ = mimetypes.guess_type(file_path)
+            if content_type is None:
+                content_type = "application/octet-stream"
+
+            f = open(file_path, "rb")
     except Exception as exc:
         print(f"Error reading file {file_path}: {exc}")
         send_error_response(
             client_socket,
             500,
-            request.get("Connection", "").lower() == "keep-alive"
+            request.get(b"connection", b"").lower() == b"keep-alive"
         )
+        return
 
+    if cached is not None:
+        send_response(client_socket, 200, cached[2], cached[3], keep_alive)
+        return
 
-def handle_client(client_socket, client_address):
-
-    global is_running
+    with f:
+        st = os.fstat(f.fileno())
+        file_size = st.st_size
 
-    keep_alive = True
+        if file_size <= max_cached_file_size:
+            content = f.read()
+            store_cached_file(file_path, st, content, content_type)
+            send_response(client_socket, 200, content, content_type, keep_alive)
+            return
 
-    while keep_alive and is_running:
+        # Large files bypass the cache; let the kernel copy them straight from the page cache
+        header_bytes = build_headers(200, file_size, content_type, keep_alive)
+        # Cork so the header goes out in the same segment as the start of the file
+        if use_cork:
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1)
         try:
+            client_socket.sendall(header_bytes)
+            client_socket.sendfile(f, 0, file_size)
+        finally:
+            if use_cork:
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0)
 
-            client_socket.settimeout(10.0)
 
-            request_data = b''
-            while b'\r\n\r\n' not in request_data:
-                chunk = client_socket.recv(1024)
-                if not chunk:
-                    keep_alive = False
-                    break
-                request_data += chunk
+def handle_client(client_socket, client_address):
 
-            if not request_data:
-                keep_alive = False
+    global is_running
+
+    keep_alive = False
+    peer_closed = False
+
+    # Normally one is free for every worker; make one if the pool ever runs dry
+    try:
+        ctx = free_contexts.get_nowait()
+    except queue.Empty:
+        ctx = ConnCtx()
+
+    try:
+        # Receive straight into the context's buffer, only scanning the new bytes
+        buffer = ctx.recv_buf
+        filled = 0
+        end = -1
+        while end < 0:
+            if filled == len(buffer):
+                ctx.grow()
+            n = client_socket.recv_into(ctx.view[filled:])
+            if not n:
+                peer_closed = True
                 break
+            end = buffer.find(b'\r\n\r\n', max(0, filled - 3), filled + n)
+            filled += n
 
-            # Parse -> HTTP headers
-            request = parse_request(request_data)
+        if filled:
+            request_data = bytes(ctx.view[:end + 4] if end >= 0 else ctx.view[:filled])
+            # Parse -> HTTP headers, into the context's dict
+            request = parse_request(request_data, ctx.headers)
+
+            # Check if the connection should be kept alive; the same rule covers the 400 below
+            keep_alive = request.get(b"connection", b"").lower() == b"keep-alive"
 
             if (
                     "method" not in request
                     or "path" not in request
                     or "version" not in request
                     or not request["path"].startswith("/")
-                    or request["version"].upper() not in ("HTTP/1.0", "HTTP/1.1")
+                    or request["version"].upper() not in (b"HTTP/1.0", b"HTTP/1.1")
             ):
                 # Malformed → 400
-                send_error_response(client_socket, 400, keep_alive=False)
-                continue
-
-            # Check if the connection should be kept alive
-            keep_alive = request.get('Connection', '').lower() == 'keep-alive'
-
-            # Process the request
-            if request['method'] == 'GET':
-                handle_get_request(client_socket, request)
-            else:
-                # Method not supported, return 400
                 send_error_response(client_socket, 400, keep_alive)
+            else:
+                # Process the request
+                if request['method'] == b'GET':
+                    handle_get_request(client_socket, request)
+                else:
+                    # Method not supported, return 400
+                    send_error_response(client_socket, 400, keep_alive)
+
+    except socket.timeout:
+        keep_alive = False
+    except Exception as e:
+        print(f"Error handling client {client_address}: {e}")
+        keep_alive = False
+    finally:
+        ctx.reset()
+        free_contexts.put(ctx)
 
-        except socket.timeout:
-            keep_alive = False
-        except Exception as e:
-            print(f"Error handling client {client_address}: {e}")
-            keep_alive = False
+    if keep_alive and is_running and not peer_closed:
+        # Wait for the next request in the accept loop, not on this worker
+        park_client(client_socket, client_address)
+        return
 
     try:
         client_socket.close()
     except:
         pass
 
-def shutdown(self, signum, frame):
+def open_wakeup():
+    """Return the (read, write) descriptors used to wake the accept loop."""
+    if hasattr(os, 'eventfd'):
+        fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        return fd, fd
+
+    # Portable fallback: a self-pipe
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    os.set_blocking(w, False)
+    return r, w
 
-    print("\nShutting down the server...")
-    self.is_running = False
-    if self.socket:
-        self.socket.close()
-    sys.exit(0)
+def wake_accept_loop():
+    try:
+        # Eight bytes is what an eventfd expects; a pipe takes it just as well
+        os.write(wakeup_w, (1).to_bytes(8, sys.byteorder))
+    except (BlockingIOError, OSError, TypeError):
+        pass
+
+def park_client(client_socket, client_address):
+    # Called from worker threads; the accept loop owns the selector and registers it
+    parked_clients.append((client_socket, client_address))
+    wake_accept_loop()
+
+def shutdown(signum, frame):
+
+    global is_running
+
+    is_running = False
+    wake_accept_loop()
 
 def cleanup():
     global server_socket
+    global worker_pool
+    global wakeup_r
+    global wakeup_w
 
+    for client_socket in list(idle_deadlines):
+        client_socket.close()
+    idle_deadlines.clear()
+    while parked_clients:
+        parked_clients.popleft()[0].close()
+
+    if wakeup_r is not None:
+        os.close(wakeup_r)
+        if wakeup_w != wakeup_r:
+            os.close(wakeup_w)
+        wakeup_r = wakeup_w = None
     if server_socket:
         server_socket.close()
         server_socket = None
+    if worker_pool:
+        worker_pool.shutdown(wait=False, cancel_futures=True)
+        worker_pool = None
     print("Server stopped.")
 
 def startServer():
@@ -284,31 +504,87 @@ def startServer():
     global host
     global port
     global is_running
+    global worker_pool
+    global wakeup_r
+    global wakeup_w
 
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
     try:
         server_socket.bind((host, port))
-        server_socket.listen(5)  # Queue up to 5 connection requests
+        server_socket.listen(128)  # Queue bursts in the kernel while every worker is busy
         is_running = True
+        worker_pool = ThreadPoolExecutor(max_workers=max_workers)
+        for _ in range(max_workers):
+            free_contexts.put(ConnCtx())
 
         print(f"HTTP Server running on http://{host}:{port}")
 
+        # Wait on the listening socket and the wakeup descriptor together
+        wakeup_r, wakeup_w = open_wakeup()
+        server_socket.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(server_socket, selectors.EVENT_READ)
+        selector.register(wakeup_r, selectors.EVENT_READ)
+
         # Register signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, shutdown)
         signal.signal(signal.SIGTERM, shutdown)
 
-        while is_running:
-            try:
-                client_socket, client_address = server_socket.accept()
-                # Start a new thread to handle the client connection
-                client_thread = threading.Thread(target=handle_client, args=(client_socket, client_address))
-                client_thread.daemon = True
-                client_thread.start()
-            except Exception as e:
-                if is_running:
-                    print(f"Error accepting connection: {e}")
+        def wait_for_request(client_socket, client_address):
+            # Idle connections sit in the selector until they send something or time out
+            selector.register(client_socket, selectors.EVENT_READ, client_address)
+            idle_deadlines[client_socket] = time.monotonic() + idle_timeout
+
+        try:
+            while is_running:
+                timeout = None
+                if idle_deadlines:
+                    timeout = max(0, min(idle_deadlines.values()) - time.monotonic())
+
+                for key, _ in selector.select(timeout):
+                    if key.fileobj is server_socket:
+                        try:
+                            client_socket, client_address = server_socket.accept()
+                        except (BlockingIOError, InterruptedError):
+                            continue
+                        except Exception as e:
+                            print(f"Error accepting connection: {e}")
+                            continue
+                        # Responses are small and written whole, so don't let Nagle hold them back
+                        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                        # Bounds a request that stalls halfway, set once per connection
+                        client_socket.settimeout(idle_timeout)
+                        wait_for_request(client_socket, client_address)
+
+                    elif key.fileobj is wakeup_r:
+                        try:
+                            os.read(wakeup_r, 4096)
+                        except BlockingIOError:
+                            pass
+                        if not is_running:
+                            break
+                        while parked_clients:
+                            wait_for_request(*parked_clients.popleft())
+
+                    else:
+                        # Request data arrived; hand the connection to the worker pool
+                        selector.unregister(key.fileobj)
+                        del idle_deadlines[key.fileobj]
+                        worker_pool.submit(handle_client, key.fileobj, key.data)
+
+                # Close connections that stayed idle past their deadline
+                now = time.monotonic()
+                for client_socket, deadline in list(idle_deadlines.items()):
+                    if deadline <= now:
+                        selector.unregister(client_socket)
+                        del idle_deadlines[client_socket]
+                        client_socket.close()
+        finally:
+            selector.close()
+
+        print("\nShutting down the server...")
 
     except Exception as e:
         print(f"Server error: {e}")
@@ -318,6 +594,7 @@ def startServer():
 def main() -> None:
     global port
     global base_directory
+    global root_real
     global host
 
     parser: Namespace = parse_arguments()
@@ -331,6 +608,8 @@ def main() -> None:
     if not os.path.exists(base_directory):
         os.makedirs(base_directory)
 
+    root_real = os.path.realpath(base_directory)
+
     # Add missing MIME types
     mimetypes.add_type('text/javascript', '.js')
     mimetypes.add_type('text/css', '.css')
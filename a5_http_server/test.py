@@ -1,18 +1,79 @@
+import asyncio
 import socket
 import os
-import threading
-import datetime
+import stat
 import mimetypes
+import time
 import signal
-import sys
+import textwrap
+from collections import OrderedDict
+from email.utils import formatdate
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote
 from argparse import Namespace, ArgumentParser
 
+try:
+    import liburing
+except ImportError:
+    # Optional; only the --io-uring backend needs it
+    liburing = None
+
 host: str='0.0.0.0'
 port: int =8000
 base_directory: str='a5_http_server/public'
-server_socket = None
+# Resolved document root, computed once in main() for the traversal check
+root_real: str=''
+server = None
 is_running = False
+stop_event = None
+worker_pool = None
+max_workers: int = (os.cpu_count() or 1) * 4
+# Processes sharing the port through SO_REUSEPORT, each with its own loop and accept queue
+processes: int = 1
+# Serve through an io_uring ring instead of the asyncio loop
+use_io_uring = False
+# Holds partial segments back while set: TCP_CORK on Linux, TCP_NOPUSH on the BSDs
+cork_option = getattr(socket, 'TCP_CORK', None) or getattr(socket, 'TCP_NOPUSH', None)
+
+CONTENT_TYPES = {
+    '.html': 'text/html',
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+    '.jpeg': 'image/jpeg',
+    '.jpg': 'image/jpeg',
+    '.png': 'image/png',
+    '.pdf': 'application/pdf'
+}
+
+# Resolved static files keyed on URL path, least recently used first.
+# Entries are re-validated against mtime and size at most once per stat_ttl seconds.
+static_cache = OrderedDict()  # path -> (checked_at, mtime_ns, size, file_path, content, content_type)
+max_cache_entries = 256
+max_cached_file_size = 1024 * 1024
+stat_ttl = 1.0
+# Longest request head accepted; anything bigger is answered with 400
+max_request_head = 16 * 1024
+
+cached_date = (0, b'')  # (second, encoded Date line)
+
+# Pieces the header builders below are compiled from
+STATUS_LINES = {
+    200: b'HTTP/1.1 200 OK\r\n',
+    201: b'HTTP/1.1 201 Created\r\n',
+    400: b'HTTP/1.1 400 Bad Request\r\n',
+    404: b'HTTP/1.1 404 Not Found\r\n',
+    500: b'HTTP/1.1 500 Internal Server Error\r\n'
+}
+CONTENT_TYPE_LINES = {
+    content_type: b'Content-Type: ' + content_type.encode('ascii') + b'; charset=utf-8\r\n'
+    for content_type in (
+        'text/html', 'text/css', 'text/javascript', 'image/jpeg',
+        'image/png', 'application/pdf', 'application/octet-stream'
+    )
+}
+SERVER_HEADER = b'Server: PythonHTTP/1.1\r\n'
+CONNECTION_KEEP_ALIVE = b'Connection: keep-alive\r\n\r\n'
+CONNECTION_CLOSE = b'Connection: close\r\n\r\n'
 
 
 def parse_arguments() -> Namespace:
@@ -22,6 +83,9 @@ def parse_arguments() -> Namespace:
         --address: The host to listen at. Default is "0.0.0.0"
         --port: The port to listen at. Default is 8000
         --directory: The directory to serve. Default is "data"
+        --workers: Threads for blocking file work. Default is 4 per CPU
+        --processes: Server processes sharing the port. Default is 1
+        --io-uring: Serve through io_uring (Linux 5.11+, needs liburing)
     :return: The parsed arguments in a Namespace object.
     """
 
@@ -36,6 +100,12 @@ def parse_arguments() -> Namespace:
                         type=int, help="Set server port", default=8000)
     parser.add_argument("-d", "--directory",
                         type=str, help="Set the directory to serve", default="a5_http_server/public")
+    parser.add_argument("-w", "--workers",
+                        type=int, help="Set the number of worker threads", default=(os.cpu_count() or 1) * 4)
+    parser.add_argument("-P", "--processes",
+                        type=int, help="Set the number of server processes", default=1)
+    parser.add_argument("--io-uring", action="store_true",
+                        help="Serve through io_uring instead of asyncio")
 
     return parser.parse_args()
 
@@ -43,73 +113,112 @@ def parse_request(request_data):
     """Parse the HTTP request headers."""
     request = {}
 
-    # Split the request into lines
-    lines = request_data.decode('utf-8', errors='replace').split('\r\n')
-
-    if not lines:
-        return request
+    # Headers are ASCII, so split the raw bytes and decode only the pieces that are kept
+    header_block = request_data.split(b'\r\n\r\n', 1)[0]
+    lines = header_block.split(b'\r\n')
 
     # Parse the request line
-    request_line_parts = lines[0].split(' ')
+    request_line_parts = lines[0].split(b' ')
     if len(request_line_parts) >= 3:
-        request['method'] = request_line_parts[0]
-        request['path'] = unquote(request_line_parts[1])
-        request['version'] = request_line_parts[2]
-
-        # Parse the headers
-        for i in range(1, len(lines)):
-            line = lines[i]
-            if not line:  # Empty line indicates end of headers
-                break
+        request['method'] = request_line_parts[0].decode('ascii', errors='replace')
+        request['path'] = unquote(request_line_parts[1].decode('utf-8', errors='replace'))
+        request['version'] = request_line_parts[2].decode('ascii', errors='replace')
 
-            if ':' in line:
-                key, value = line.split(':', 1)
-                request[key.strip()] = value.strip()
+        # Parse the headers; names are lowercased once here, and latin-1 maps every byte,
+        # so decoding cannot fail
+        for line in lines[1:]:
+            key, sep, value = line.partition(b':')
+            if sep:
+                request[key.strip().lower().decode('latin-1')] = value.strip().decode('latin-1')
 
     return request
 
-def send_response(client_socket, status_code, content, content_type, keep_alive=False):
-    """Send an HTTP response."""
-    status_message = {
-        200: 'OK',
-        201: 'Created',
-        400: 'Bad Request',
-        404: 'Not Found',
-        500: 'Internal Server Error'
-    }.get(status_code, 'Unknown')
-
-    # Build the response headers
-    headers = [
-        f"HTTP/1.1 {status_code} {status_message}",
-        f"Date: {datetime.datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')}",
-        f"Server: PythonHTTP/1.1",
-        f"Content-Length: {len(content)}",
-        f"Content-Type: {content_type}; charset=utf-8"
-    ]
-
-    if keep_alive:
-        headers.append("Connection: keep-alive")
-    else:
-        headers.append("Connection: close")
-
-    # Join headers and add empty line
-    header_bytes = '\r\n'.join(headers).encode('utf-8') + b'\r\n\r\n'
+def get_date_header():
+    """Return the encoded Date header line for the current second."""
+    global cached_date
 
-    # Send headers
-    client_socket.send(header_bytes)
+    now = int(time.time())
+    if now != cached_date[0]:
+        cached_date = (now, b'Date: ' + formatdate(now, usegmt=True).encode('ascii') + b'\r\n')
+    return cached_date[1]
 
-    # Send content in chunks to avoid using sendall()
-    content_length = len(content)
-    offset = 0
-    chunk_size = 4096
-
-    while offset < content_length:
-        end = min(offset + chunk_size, content_length)
-        client_socket.send(content[offset:end])
-        offset = end
+def make_header_builder(status_code, content_type, keep_alive):
+    """
+    Compile the header builder for one (status, content type, keep-alive) combination.
+    Everything but the Date line and the length is a literal in the generated code.
+    """
+    status_line = STATUS_LINES.get(status_code)
+    if status_line is None:
+        status_line = b'HTTP/1.1 %d Unknown\r\n' % status_code
+
+    content_type_line = CONTENT_TYPE_LINES.get(content_type)
+    if content_type_line is None:
+        content_type_line = f"Content-Type: {content_type}; charset=utf-8\r\n".encode('utf-8')
+
+    # The Connection fragment carries the closing blank line
+    middle = SERVER_HEADER + b'Content-Length: '
+    tail = b'\r\n' + content_type_line + (CONNECTION_KEEP_ALIVE if keep_alive else CONNECTION_CLOSE)
+
+    # One format literal with a hole for the Date line and one for the length
+    template = b'%s'.join([
+        status_line.replace(b'%', b'%%'),
+        middle.replace(b'%', b'%%') + b'%d' + tail.replace(b'%', b'%%')
+    ])
+
+    source = textwrap.dedent(f"""\
+        def build(n, date):
+            return {template!r} % (date, n)
+    """)
+    namespace = {}
+    exec(source, namespace)
+    return namespace['build']
+
+# (status_code, content_type, keep_alive) -> compiled header builder
+HEADER_BUILDERS = {
+    (status_code, content_type, keep_alive): make_header_builder(status_code, content_type, keep_alive)
+    for status_code in STATUS_LINES
+    for content_type in CONTENT_TYPE_LINES
+    for keep_alive in (False, True)
+}
+
+def build_headers(status_code, content_length, content_type, keep_alive=False):
+    """Build the encoded HTTP response header block."""
+    builder = HEADER_BUILDERS.get((status_code, content_type, keep_alive))
+    if builder is None:
+        # A type outside the table; remember its builder, the set mimetypes can return is small
+        builder = make_header_builder(status_code, content_type, keep_alive)
+        HEADER_BUILDERS[(status_code, content_type, keep_alive)] = builder
+
+    return builder(content_length, get_date_header())
+
+async def send_response(writer, status_code, content, content_type, keep_alive=False):
+    """Send an HTTP response with an in-memory body."""
+    header_bytes = build_headers(status_code, len(content), content_type, keep_alive)
+
+    # Hand header and body over together so the transport can send them in one call
+    # (sendmsg on Python 3.12+, one joined send before that); the rest is buffered
+    writer.writelines((header_bytes, content))
+    await writer.drain()
+
+async def send_file_response(writer, status_code, file_obj, size, content_type, keep_alive=False):
+    """Send an HTTP response whose body is an open file, copied by the kernel."""
+    header_bytes = build_headers(status_code, size, content_type, keep_alive)
+
+    # Cork so the header leaves in the same segment as the start of the file
+    sock = writer.get_extra_info('socket')
+    if cork_option is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, cork_option, 1)
+    try:
+        writer.write(header_bytes)
 
-def send_error_response(client_socket, status_code, keep_alive=False):
+        # sendfile(2) where available; the file never passes through Python
+        await asyncio.get_running_loop().sendfile(writer.transport, file_obj, 0, size)
+    finally:
+        if cork_option is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, cork_option, 0)
 
+def error_page(status_code):
+    """Return the body of the error page for a status code."""
     global base_directory
 
     error_file_name = f"{status_code}.html"
@@ -118,10 +227,8 @@ def send_error_response(client_socket, status_code, keep_alive=False):
     if os.path.isfile(error_file_path):
         try:
             with open(error_file_path, "rb") as f:
-                content = f.read()
-            # Serve the custom page
-            send_response(client_socket, status_code, content, "text/html", keep_alive)
-            return
+                # Serve the custom page
+                return f.read()
         except Exception as exc:
             # If reading the custom page fails, fall back to generic page
             print(f"Could not read custom error page {error_file_path}: {exc}")
@@ -132,7 +239,7 @@ def send_error_response(client_socket, status_code, keep_alive=False):
         500: "Internal Server Error"
     }.get(status_code, "Unknown Error")
 
-    content = f"""\
+    return f"""\
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -145,85 +252,161 @@ def send_error_response(client_socket, status_code, keep_alive=False):
 </body>
 </html>""".encode("utf-8")
 
-    send_response(client_socket, status_code, content, "text/html", keep_alive)
+async def send_error_response(writer, status_code, keep_alive=False):
+    await send_response(writer, status_code, error_page(status_code), "text/html", keep_alive)
 
 
-def handle_get_request(client_socket, request):
-
-    global base_directory
-
+def resolve_get_request(request):
+    """
+    Work out the response to a GET request without sending anything.
+    :return: (status_code, content, file_obj, content_type); exactly one of
+        content and file_obj is set, an open file is handed over to the caller.
+    """
+    global root_real
 
     raw_path = request.get("path", "/")
     path = raw_path if raw_path.startswith("/") else "/" + raw_path
 
-    file_path = os.path.normpath(os.path.join(base_directory, path.lstrip("/")))
+    entry = static_cache.get(path)
+    now = time.monotonic()
 
+    try:
+        if entry is not None and now - entry[0] >= stat_ttl:
+            # Re-check the file at most once per TTL; drop the entry if it changed
+            st = os.stat(entry[3])
+            if (st.st_mtime_ns, st.st_size) == (entry[1], entry[2]):
+                entry = (now,) + entry[1:]
+                static_cache[path] = entry
+            else:
+                del static_cache[path]
+                entry = None
+    except OSError:
+        del static_cache[path]
+        entry = None
 
-    if os.path.isdir(file_path):
-        index_path = os.path.join(file_path, "index.html")
-        if os.path.isfile(index_path):
-            file_path = index_path
-        else:
-            # Directory without index.html → 404
-            send_error_response(
-                client_socket,
-                404,
-                request.get("Connection", "").lower() == "keep-alive"
-            )
-            return
+    if entry is not None:
+        static_cache.move_to_end(path)
+        _, _, _, file_path, content, content_type = entry
 
-    if not os.path.isfile(file_path):
-        send_error_response(
-            client_socket,
-            404,
-            request.get("Connection", "").lower() == "keep-alive"
-        )
-        return
+        if content is not None:
+            return 200, content, None, content_type
+
+        try:
+            return 200, None, open(file_path, "rb"), content_type
+        except Exception as exc:
+            print(f"Error reading file {file_path}: {exc}")
+            return 500, error_page(500), None, "text/html"
 
-    content_type, _ = mimetypes.guess_type(file_path)
+    # Resolve '..' and symlinks, then make sure the result is still under the root
+    try:
+        file_path = os.path.realpath(os.path.join(root_real, path.lstrip("/")))
+    except ValueError:
+        # Embedded NUL
+        return 400, error_page(400), None, "text/html"
+    if file_path != root_real and not file_path.startswith(root_real + os.sep):
+        return 400, error_page(400), None, "text/html"
+
+    # One stat tells both whether it exists and whether it is a directory
+    try:
+        st = os.stat(file_path)
+        if stat.S_ISDIR(st.st_mode):
+            file_path = os.path.join(file_path, "index.html")
+            st = os.stat(file_path)
+    except (OSError, ValueError):
+        # Missing, or a directory without index.html → 404
+        return 404, error_page(404), None, "text/html"
+
+    if not stat.S_ISREG(st.st_mode):
+        return 404, error_page(404), None, "text/html"
+
+    content_type = CONTENT_TYPES.get(os.path.splitext(file_path)[1].lower())
+    if content_type is None:
+        # Unknown extension, fall back to the full mimetypes registry
+        content_type, _ = mimetypes.guess_type(file_path)
     if content_type is None:
         content_type = "application/octet-stream"
 
     try:
-        with open(file_path, "rb") as f:
-            content = f.read()
-
-        send_response(
-            client_socket,
-            200,
-            content,
-            content_type,
-            request.get("Connection", "").lower() == "keep-alive"
-        )
+        f = open(file_path, "rb")
+    except Exception as exc:
+        print(f"Error reading file {file_path}: {exc}")
+        return 500, error_page(500), None, "text/html"
 
+    try:
+        st = os.fstat(f.fileno())
+        # Large files are only described here and keep going out through sendfile
+        content = f.read() if st.st_size <= max_cached_file_size else None
     except Exception as exc:
+        f.close()
         print(f"Error reading file {file_path}: {exc}")
-        send_error_response(
-            client_socket,
-            500,
-            request.get("Connection", "").lower() == "keep-alive"
-        )
+        return 500, error_page(500), None, "text/html"
+
+    static_cache[path] = (now, st.st_mtime_ns, st.st_size, file_path, content, content_type)
+    if len(static_cache) > max_cache_entries:
+        static_cache.popitem(last=False)
+
+    if content is not None:
+        f.close()
+        return 200, content, None, content_type
+    return 200, None, f, content_type
+
+async def handle_get_request(writer, request, keep_alive):
+
+    status_code, content, f, content_type = resolve_get_request(request)
+
+    if f is None:
+        await send_response(writer, status_code, content, content_type, keep_alive)
+        return
 
+    # Stream straight from the descriptor; nothing of the file is held in Python.
+    # Its own fstat size goes in Content-Length, in case the file changed since it was cached
+    try:
+        with f:
+            await send_file_response(writer, status_code, f, os.fstat(f.fileno()).st_size, content_type, keep_alive)
+
+    except Exception as exc:
+        print(f"Error reading file {f.name}: {exc}")
+        await send_error_response(writer, 500, keep_alive)
+
+def wants_keep_alive(request):
+    """HTTP/1.1 connections stay open unless the client says close; HTTP/1.0 ones only on request."""
+    connection = request.get("connection", "").lower()
+    if request.get("version", "").upper() == "HTTP/1.1":
+        return connection != "close"
+    return connection == "keep-alive"
+
+def is_valid_request(request):
+    """Check that the request line parsed into something this server can answer."""
+    return (
+        "method" in request
+        and "path" in request
+        and "version" in request
+        and request["path"].startswith("/")
+        and request["version"].upper() in ("HTTP/1.0", "HTTP/1.1")
+    )
 
-def handle_client(client_socket, client_address):
+
+async def handle_client(reader, writer):
     """Handle a client connection."""
     global is_running
 
+    client_address = writer.get_extra_info('peername')
+    # asyncio already does this for TCP transports; be explicit since the responses rely on it
+    writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     keep_alive = True
 
     while keep_alive and is_running:
         try:
-            # Set a timeout for the client socket
-            client_socket.settimeout(10.0)
-
-            # Receive and parse the request
-            request_data = b''
-            while b'\r\n\r\n' not in request_data:
-                chunk = client_socket.recv(1024)
-                if not chunk:
-                    keep_alive = False
-                    break
-                request_data += chunk
+            # Receive the request head; an idle keep-alive connection is dropped after 10 seconds
+            try:
+                request_data = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10.0)
+            except asyncio.IncompleteReadError as exc:
+                # Connection closed; still answer whatever partial request arrived
+                request_data = exc.partial
+                keep_alive = False
+            except asyncio.LimitOverrunError:
+                await send_error_response(writer, 400, keep_alive=False)
+                break
 
             if not request_data:
                 keep_alive = False
@@ -232,105 +415,525 @@ def handle_client(client_socket, client_address):
             # Parse the HTTP headers
             request = parse_request(request_data)
 
-            if (
-                    "method" not in request
-                    or "path" not in request
-                    or "version" not in request
-                    or not request["path"].startswith("/")
-                    or request["version"].upper() not in ("HTTP/1.0", "HTTP/1.1")
-            ):
-                # Malformed → 400
-                send_error_response(client_socket, 400, keep_alive=False)
-                continue
-
             # Check if the connection should be kept alive
-            keep_alive = request.get('Connection', '').lower() == 'keep-alive'
+            keep_alive = keep_alive and wants_keep_alive(request)
+
+            if not is_valid_request(request):
+                # Malformed → 400, under the same keep-alive rule as any other response
+                await send_error_response(writer, 400, keep_alive)
+                continue
 
             # Process the request
             if request['method'] == 'GET':
-                handle_get_request(client_socket, request)
+                await handle_get_request(writer, request, keep_alive)
             else:
                 # Method not supported, return 400
-                send_error_response(client_socket, 400, keep_alive)
+                await send_error_response(writer, 400, keep_alive)
 
-        except socket.timeout:
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # Timed out, or the server is shutting down and cancelled this connection
             keep_alive = False
         except Exception as e:
             print(f"Error handling client {client_address}: {e}")
             keep_alive = False
 
     try:
-        client_socket.close()
+        writer.close()
+        await writer.wait_closed()
     except:
         pass
 
-def shutdown(self, signum, frame):
+def shutdown():
+
+    global is_running
 
     print("\nShutting down the server...")
-    self.is_running = False
-    if self.socket:
-        self.socket.close()
-    sys.exit(0)
+    is_running = False
+    stop_event.set()
 
 def cleanup():
-    global server_socket
-
-    if server_socket:
-        server_socket.close()
-        server_socket = None
+    global server
+    global worker_pool
+
+    if server:
+        server.close()
+        server = None
+    if worker_pool:
+        worker_pool.shutdown(wait=False, cancel_futures=True)
+        worker_pool = None
     print("Server stopped.")
 
-def startServer():
-    global server_socket
+def create_server_socket():
+    """Create this process's listening socket."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if processes > 1:
+        # Every process binds its own socket; the kernel spreads new connections across them
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    try:
+        sock.bind((host, port))
+        sock.listen(1024)  # Queue bursts in the kernel while the loop catches up
+    except:
+        sock.close()
+        raise
+    sock.setblocking(False)
+    return sock
+
+async def serve():
+    global server
     global host
     global port
     global is_running
+    global stop_event
+    global worker_pool
 
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
 
     try:
-        server_socket.bind((host, port))
-        server_socket.listen(5)  # Queue up to 5 connection requests
+        # One thread multiplexes every connection; the pool only backs blocking fallbacks
+        worker_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http")
+        loop.set_default_executor(worker_pool)
+
+        # The stream buffer is a bytearray scanned only past the previous search position,
+        # and its limit caps how much a client can make it hold before the blank line
+        server = await asyncio.start_server(
+            handle_client, sock=create_server_socket(), limit=max_request_head
+        )
         is_running = True
 
         print(f"HTTP Server running on http://{host}:{port}")
 
         # Register signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, shutdown)
-        signal.signal(signal.SIGTERM, shutdown)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, shutdown)
+            except NotImplementedError:
+                # No loop signal support (Windows); hop back onto the loop from the handler
+                signal.signal(signum, lambda *_: loop.call_soon_threadsafe(shutdown))
 
+        await stop_event.wait()
+
+    except Exception as e:
+        print(f"Server error: {e}")
+    finally:
+        cleanup()
+
+# user_data of every submission: connection id shifted left, operation in the low bits
+URING_ACCEPT = 0
+URING_RECV = 1
+URING_SEND = 2
+URING_READ = 3
+URING_TIMEOUT = 4
+URING_OP_BITS = 3
+uring_chunk_size = 64 * 1024
+# Descriptor table slots registered with the ring (slot 0 is the listening socket)
+# and fixed receive buffers; connections beyond either pool use plain fds/buffers
+uring_file_slots = 1024
+uring_recv_buffers = 256
+uring_recv_buffer_size = 8 * 1024
+
+
+def kernel_version():
+    """Return the running kernel's (major, minor) release, (0, 0) if unknown."""
+    try:
+        major, minor = os.uname().release.split('.')[:2]
+        return int(major), int(''.join(c for c in minor if c.isdigit()) or 0)
+    except (AttributeError, ValueError):
+        return 0, 0
+
+def io_uring_available():
+    """io_uring needs the binding and a 5.11+ kernel (SQPOLL without privileges)."""
+    if liburing is None:
+        print("liburing is not installed; using the asyncio backend")
+        return False
+    if kernel_version() < (5, 11):
+        print("io_uring needs Linux 5.11 or newer; using the asyncio backend")
+        return False
+    return True
+
+
+class UringConnection:
+    """State of one client connection served from the ring."""
+
+    def __init__(self, conn_id, sock):
+        self.conn_id = conn_id
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.slot = None              # registered file slot, None if the table was full
+        self.recv_buf = None          # buffer the pending recv fills
+        self.buf_index = None         # its fixed buffer index, None for a plain buffer
+        self.received = bytearray()   # request bytes not answered yet
+        self.keep_alive = True
+        self.closing = False
+        self.inflight = 0             # submissions whose completion has not been reaped
+        self.sends_left = 0           # linked sends of the response part in flight
+        self.buffers = []             # keeps submitted buffers alive until completion
+        self.file = None              # large file being streamed
+        self.offset = 0
+        self.remaining = 0
+
+
+class UringServer:
+    """
+    The server loop on top of io_uring: one ring per process, multishot accept,
+    recv with a linked idle timeout and header+body submitted as linked sends.
+    Submissions queued while a batch of completions is reaped go in one submit.
+    """
+
+    def __init__(self, sock):
+        self.listen_sock = sock
+        self.ring = liburing.Ring()
+        self.cqe = liburing.Cqe()
+        self.connections = {}
+        self.next_id = 1
+        self.idle_timeout = liburing.timespec(10)
+        self.multishot = kernel_version() >= (5, 19)
+        self.files = None
+        self.free_slots = []
+        self.recv_pool = []
+        self.free_buffers = []
+
+        try:
+            # A kernel thread polls the submission queue, so steady state needs no syscalls
+            liburing.io_uring_queue_init(1024, self.ring, liburing.IORING_SETUP_SQPOLL)
+        except OSError:
+            # SQPOLL can be refused (limits, containers); a plain ring still batches
+            liburing.io_uring_queue_init(1024, self.ring, 0)
+
+        try:
+            # Registered descriptors skip the per-operation file reference counting
+            self.files = liburing.FileIndex([sock.fileno()] + [-1] * (uring_file_slots - 1))
+            liburing.io_uring_register_files(self.ring, self.files)
+            self.free_slots = list(range(uring_file_slots - 1, 0, -1))
+        except OSError as exc:
+            print(f"Could not register files with io_uring: {exc}")
+            self.files = None
+
+        try:
+            # Fixed buffers are pinned once here instead of on every receive
+            pool = [bytearray(uring_recv_buffer_size) for _ in range(uring_recv_buffers)]
+            self.iovecs = liburing.Iovec(pool)
+            liburing.io_uring_register_buffers(self.ring, self.iovecs)
+            self.recv_pool = pool
+            self.free_buffers = list(range(uring_recv_buffers - 1, -1, -1))
+        except OSError as exc:
+            print(f"Could not register buffers with io_uring: {exc}")
+
+    @staticmethod
+    def target(conn):
+        """The registered slot of a connection if it has one, else its fd."""
+        return conn.fd if conn.slot is None else conn.slot
+
+    def get_sqe(self):
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        if sqe is None:
+            # Submission queue full; hand what is queued to the kernel first
+            liburing.io_uring_submit(self.ring)
+            sqe = liburing.io_uring_get_sqe(self.ring)
+        return sqe
+
+    def submit_accept(self):
+        sqe = self.get_sqe()
+        fd = self.listen_sock.fileno() if self.files is None else 0
+        if self.multishot:
+            liburing.io_uring_prep_multishot_accept(sqe, fd)
+        else:
+            liburing.io_uring_prep_accept(sqe, fd)
+        if self.files is not None:
+            liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_FIXED_FILE)
+        liburing.io_uring_sqe_set_data64(sqe, URING_ACCEPT)
+
+    def submit_recv(self, conn):
+        sqe = self.get_sqe()
+        if self.free_buffers:
+            # READ_FIXED into a registered buffer; returned to the pool on completion
+            conn.buf_index = self.free_buffers.pop()
+            conn.recv_buf = self.recv_pool[conn.buf_index]
+            liburing.io_uring_prep_read_fixed(sqe, self.target(conn), conn.recv_buf, conn.buf_index, 0)
+        else:
+            conn.buf_index = None
+            conn.recv_buf = bytearray(uring_recv_buffer_size)
+            liburing.io_uring_prep_recv(sqe, self.target(conn), conn.recv_buf)
+        liburing.io_uring_sqe_set_data64(sqe, conn.conn_id << URING_OP_BITS | URING_RECV)
+        liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK
+                                        | (liburing.IOSQE_FIXED_FILE if conn.slot is not None else 0))
+
+        # An idle keep-alive connection is dropped after 10 seconds
+        sqe = self.get_sqe()
+        liburing.io_uring_prep_link_timeout(sqe, self.idle_timeout, 0)
+        liburing.io_uring_sqe_set_data64(sqe, conn.conn_id << URING_OP_BITS | URING_TIMEOUT)
+        conn.inflight += 2
+
+    def submit_sends(self, conn, buffers):
+        """Queue buffers as linked sends so they go out in order, in one submit."""
+        for i, data in enumerate(buffers):
+            sqe = self.get_sqe()
+            # MSG_WAITALL makes the kernel finish short sends itself instead of breaking the link
+            liburing.io_uring_prep_send(sqe, self.target(conn), data, socket.MSG_WAITALL)
+            liburing.io_uring_sqe_set_data64(sqe, conn.conn_id << URING_OP_BITS | URING_SEND)
+            flags = liburing.IOSQE_FIXED_FILE if conn.slot is not None else 0
+            if i < len(buffers) - 1:
+                flags |= liburing.IOSQE_IO_LINK
+            liburing.io_uring_sqe_set_flags(sqe, flags)
+        conn.buffers.extend(buffers)
+        conn.sends_left += len(buffers)
+        conn.inflight += len(buffers)
+
+    def submit_file_chunk(self, conn):
+        """Read the next piece of a large file and send it, linked."""
+        chunk = bytearray(min(conn.remaining, uring_chunk_size))
+        sqe = self.get_sqe()
+        liburing.io_uring_prep_read(sqe, conn.file.fileno(), chunk, conn.offset)
+        liburing.io_uring_sqe_set_data64(sqe, conn.conn_id << URING_OP_BITS | URING_READ)
+        liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+        conn.inflight += 1
+        conn.offset += len(chunk)
+        conn.remaining -= len(chunk)
+        self.submit_sends(conn, [chunk])
+
+    def respond(self, conn, status_code, content, content_type, keep_alive):
+        conn.keep_alive = keep_alive
+        self.submit_sends(conn, [build_headers(status_code, len(content), content_type, keep_alive), content])
+
+    def handle_request(self, conn, request_data):
+        request = parse_request(request_data)
+
+        keep_alive = conn.keep_alive and wants_keep_alive(request)
+
+        if not is_valid_request(request):
+            # Malformed → 400, under the same keep-alive rule as any other response
+            self.respond(conn, 400, error_page(400), "text/html", keep_alive)
+            return
+        if request['method'] != 'GET':
+            # Method not supported, return 400
+            self.respond(conn, 400, error_page(400), "text/html", keep_alive)
+            return
+
+        status_code, content, f, content_type = resolve_get_request(request)
+        if f is None:
+            self.respond(conn, status_code, content, content_type, keep_alive)
+            return
+
+        # The file goes out in read+send pairs after the header; its own fstat size is sent
+        try:
+            size = os.fstat(f.fileno()).st_size
+        except OSError as exc:
+            f.close()
+            print(f"Error reading file {f.name}: {exc}")
+            self.respond(conn, 500, error_page(500), "text/html", keep_alive)
+            return
+        conn.keep_alive = keep_alive
+        conn.file, conn.offset, conn.remaining = f, 0, size
+        self.submit_sends(conn, [build_headers(status_code, size, content_type, keep_alive)])
+
+    def next_request(self, conn):
+        """Answer the next buffered request head, or wait for more bytes."""
+        end = conn.received.find(b'\r\n\r\n')
+        if end != -1 and end + 4 <= max_request_head:
+            request_data = bytes(conn.received[:end + 4])
+            del conn.received[:end + 4]
+            self.handle_request(conn, request_data)
+        elif end != -1 or len(conn.received) > max_request_head:
+            self.respond(conn, 400, error_page(400), "text/html", False)
+        else:
+            self.submit_recv(conn)
+
+    def close(self, conn):
+        conn.closing = True
+        # The descriptor may only go once the kernel has finished with it
+        if conn.inflight == 0 and self.connections.pop(conn.conn_id, None) is not None:
+            if conn.slot is not None:
+                liburing.io_uring_register_files_update(self.ring, liburing.FileIndex([-1]), conn.slot)
+                self.free_slots.append(conn.slot)
+            if conn.file is not None:
+                conn.file.close()
+            conn.sock.close()
+
+    def on_accept(self, res, flags):
+        if not flags & liburing.IORING_CQE_F_MORE:
+            # Single-shot accept, or multishot was stopped; arm it again
+            self.submit_accept()
+        if res < 0:
+            return
+
+        sock = socket.socket(fileno=res)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = UringConnection(self.next_id, sock)
+        self.next_id += 1
+        if self.free_slots:
+            conn.slot = self.free_slots.pop()
+            liburing.io_uring_register_files_update(self.ring, liburing.FileIndex([res]), conn.slot)
+        self.connections[conn.conn_id] = conn
+        self.submit_recv(conn)
+
+    def on_recv(self, conn, res):
+        buf, conn.recv_buf = conn.recv_buf, None
+        if res > 0:
+            conn.received += buf[:res]
+        if conn.buf_index is not None:
+            # Copied out; the fixed buffer can serve the next receive
+            self.free_buffers.append(conn.buf_index)
+            conn.buf_index = None
+
+        if conn.closing:
+            return
+        if res <= 0:
+            # Closed, failed or idle past the timeout; still answer a partial request
+            if res == 0 and conn.received:
+                conn.keep_alive = False
+                data = bytes(conn.received)
+                conn.received.clear()
+                self.handle_request(conn, data)
+            else:
+                self.close(conn)
+            return
+
+        self.next_request(conn)
+
+    def on_send(self, conn, res):
+        conn.sends_left -= 1
+        if conn.closing:
+            return
+        if res < 0:
+            self.close(conn)
+            return
+        if conn.sends_left:
+            return
+
+        conn.buffers.clear()
+        if conn.remaining:
+            self.submit_file_chunk(conn)
+            return
+        if conn.file is not None:
+            conn.file.close()
+            conn.file = None
+
+        if conn.keep_alive and is_running:
+            self.next_request(conn)
+        else:
+            self.close(conn)
+
+    def on_read(self, conn, res):
+        if res < 0 and not conn.closing:
+            # The file shrank or failed; the linked send is cancelled, drop the connection
+            self.close(conn)
+
+    def run(self):
+        global is_running
+
+        self.submit_accept()
         while is_running:
+            liburing.io_uring_submit(self.ring)
             try:
-                client_socket, client_address = server_socket.accept()
-                # Start a new thread to handle the client connection
-                client_thread = threading.Thread(target=handle_client, args=(client_socket, client_address))
-                client_thread.daemon = True
-                client_thread.start()
-            except Exception as e:
-                if is_running:
-                    print(f"Error accepting connection: {e}")
+                liburing.io_uring_wait_cqe(self.ring, self.cqe)
+            except InterruptedError:
+                # A signal; its handler decides whether the loop keeps going
+                continue
+
+            # Reap every completion that is ready before submitting again
+            while True:
+                c = self.cqe[0]
+                user_data, flags = c.user_data, c.flags
+                try:
+                    res = c.res
+                except OSError as exc:
+                    res = -exc.errno
+                liburing.io_uring_cqe_seen(self.ring, c)
+                self.dispatch(user_data, res, flags)
+                try:
+                    liburing.io_uring_peek_cqe(self.ring, self.cqe)
+                except BlockingIOError:
+                    break
+
+    def dispatch(self, user_data, res, flags):
+        op = user_data & ((1 << URING_OP_BITS) - 1)
+        if op == URING_ACCEPT:
+            self.on_accept(res, flags)
+            return
+
+        conn = self.connections.get(user_data >> URING_OP_BITS)
+        if conn is None:
+            return
+        conn.inflight -= 1
+        if op == URING_RECV:
+            self.on_recv(conn, res)
+        elif op == URING_SEND:
+            self.on_send(conn, res)
+        elif op == URING_READ:
+            self.on_read(conn, res)
+        if conn.closing:
+            self.close(conn)
+
+    def cleanup(self):
+        # Tearing the ring down cancels whatever is still in flight
+        liburing.io_uring_queue_exit(self.ring)
+        for conn in self.connections.values():
+            if conn.file is not None:
+                conn.file.close()
+            conn.sock.close()
+        self.connections.clear()
+        self.listen_sock.close()
+
+
+def serve_uring():
+    global is_running
+
+    def stop(signum, frame):
+        global is_running
+        print("\nShutting down the server...")
+        is_running = False
+
+    uring_server = None
+    try:
+        sock = create_server_socket()
+        uring_server = UringServer(sock)
+        is_running = True
+
+        print(f"HTTP Server running on http://{host}:{port} (io_uring)")
+
+        # A signal interrupts the wait for completions, then the loop sees is_running
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        uring_server.run()
 
     except Exception as e:
         print(f"Server error: {e}")
     finally:
-        cleanup()
+        if uring_server is not None:
+            uring_server.cleanup()
+        print("Server stopped.")
+
+def startServer():
+    if use_io_uring:
+        serve_uring()
+    else:
+        asyncio.run(serve())
 
 def main() -> None:
     global port
     global base_directory
     global host
+    global max_workers
+    global processes
+    global use_io_uring
+    global root_real
 
     parser: Namespace = parse_arguments()
     port = parser.port
     host = parser.address
     base_directory = parser.directory
+    max_workers = parser.workers
+    processes = parser.processes
+    use_io_uring = parser.io_uring and io_uring_available()
 
     # Your implementation here
 
     # Ensure document root exists
     if not os.path.exists(base_directory):
         os.makedirs(base_directory)
+    root_real = os.path.realpath(base_directory)
 
     # Add missing MIME types
     mimetypes.add_type('text/javascript', '.js')
@@ -340,8 +943,29 @@ def main() -> None:
     mimetypes.add_type('image/png', '.png')
     mimetypes.add_type('application/pdf', '.pdf')
 
+    if processes > 1 and not (hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')):
+        print("Multiple processes need fork and SO_REUSEPORT; running a single process")
+        processes = 1
+
+    # Fork the extra processes before any loop or thread exists
+    children = []
+    for _ in range(processes - 1):
+        pid = os.fork()
+        if pid == 0:
+            startServer()
+            os._exit(0)
+        children.append(pid)
+
     startServer()
 
+    # Take the other processes down with this one
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        os.waitpid(pid, 0)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,18 +1,7 @@
 import os
-from argparse import Namespace, ArgumentParser
-from zipfile import ZipFile
-
-
-def parse_arguments() -> Namespace:
-    parser: ArgumentParser = ArgumentParser(
-        prog="python export.py",
-        description="Export assignment for submission in CodeGrade.",
-    )
-    parser.add_argument(
-        "assignment", type=str, help="Assignment name",
-        choices=[f"a{i}" for i in [1, 3, 5, 6, 7]]
-    )
-    return parser.parse_args()
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import ZipFile, ZipInfo, ZIP_STORED
 
 
 ASSIGNMENT_MAP: dict[str, str] = {
@@ -24,19 +13,75 @@ ASSIGNMENT_MAP: dict[str, str] = {
     "a8": "a8_game"
 }
 
+USAGE = f"usage: python export.py [-h] {{{','.join(ASSIGNMENT_MAP)}}}"
+
+
+def usage_error(message: str) -> None:
+    print(USAGE, file=sys.stderr)
+    print(f"python export.py: error: {message}", file=sys.stderr)
+    sys.exit(2)
+
+
+def parse_arguments() -> str:
+    """
+    Parse the single positional argument by hand; importing argparse
+    would cost more than the rest of the export. Help, usage and error
+    output follow what argparse printed.
+    :return: The assignment name.
+    """
+    args = sys.argv[1:]
+    if "-h" in args or "--help" in args:
+        print(f"{USAGE}\n\nExport assignment for submission in CodeGrade.")
+        sys.exit(0)
+
+    positionals = [arg for arg in args if not arg.startswith("-")]
+    if not positionals:
+        usage_error("the following arguments are required: assignment")
+    assignment = positionals[0]
+    if assignment not in ASSIGNMENT_MAP:
+        choices = ", ".join(f"'{name}'" for name in ASSIGNMENT_MAP)
+        usage_error(f"argument assignment: invalid choice: '{assignment}' (choose from {choices})")
+    extra = args[:]
+    extra.remove(assignment)
+    if extra:
+        usage_error(f"unrecognized arguments: {' '.join(extra)}")
+    return assignment
+
+
+def collect_files(directory: str, assignment_dir: str) -> list[tuple[str, str]]:
+    """List (path, name in archive) for every file to export, skipping compiled Python."""
+    found: list[tuple[str, str]] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name != "__pycache__":
+                    found.extend(collect_files(entry.path, assignment_dir))
+            elif not entry.name.endswith(".pyc"):
+                found.append((entry.path, os.path.relpath(entry.path, assignment_dir)))
+    return found
+
+
+def read_file(file: tuple[str, str]) -> tuple[ZipInfo, bytes]:
+    file_path, arcname = file
+    # from_file keeps the timestamp and permissions zipf.write would have stored
+    info = ZipInfo.from_file(file_path, arcname)
+    with open(file_path, "rb") as f:
+        return info, f.read()
+
 
 def main() -> None:
     global ASSIGNMENT_MAP
-    args: Namespace = parse_arguments()
-    assert args.assignment in ASSIGNMENT_MAP
-
-    assignment_dir: str = ASSIGNMENT_MAP[args.assignment]
-    with ZipFile(f"{args.assignment}.zip", "w") as zipf:
-        for root, _, files in os.walk(assignment_dir):
-            for file in files:
-                if ".pyc" in file or "__pycache__" in root: continue
-                file_path = os.path.join(root, file)
-                zipf.write(file_path, os.path.relpath(file_path, assignment_dir))
+    assignment: str = parse_arguments()
+    assert assignment in ASSIGNMENT_MAP
+
+    assignment_dir: str = ASSIGNMENT_MAP[assignment]
+    files = collect_files(assignment_dir, assignment_dir)
+    with ZipFile(f"{assignment}.zip", "w", compression=ZIP_STORED, allowZip64=True) as zipf, \
+            ThreadPoolExecutor() as pool:
+        # Files are read in parallel; ZipFile is not thread-safe, so only this thread writes,
+        # in listing order so the archive comes out the same every run
+        for info, data in pool.map(read_file, files):
+            zipf.writestr(info, data)
 
 
 if __name__ == "__main__":